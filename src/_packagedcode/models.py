@@ -141,6 +141,9 @@ class ModelMixin:
     """
     Base mixin for all package models.
     """
+    # without this, the attrs slots=True subclasses still get a per-instance
+    # __dict__ from this plain base class
+    __slots__ = ()
 
     def to_dict(self, **kwargs):
         """
@@ -9,15 +9,25 @@
 #
 
 import ast
+from collections import deque
 from configparser import ConfigParser
 import copy
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+import email
+import email.message
+import functools
+from itertools import chain
 import json
 import logging
+import multiprocessing
 from pathlib import Path
 import os
 import re
 import sys
 from typing import NamedTuple
+from urllib.parse import quote
 import tempfile
 import zipfile
 import dparse2
@@ -55,6 +65,21 @@ Detect and collect Python packages information.
 
 TRACE = False
 
+# canonicalize_name is a pure function of its string argument and the same
+# names recur across all the files of a codebase: memoize it
+canonicalize_name = functools.lru_cache(maxsize=8192)(canonicalize_name)
+
+
+@functools.lru_cache(maxsize=8192)
+def build_requirement(requirement_string):
+    """
+    Return a Requirement built from a ``requirement_string`` string. Parsing a
+    requirement is comparatively expensive and the same strings recur across
+    files: the Requirement objects are cached and shared, and must be treated
+    as read-only.
+    """
+    return Requirement(requirement_string)
+
 
 def logger_debug(*args):
     pass
@@ -419,6 +444,18 @@ class PyprojectTomlHandler(models.NonAssemblableDatafileHandler):
 
 META_DIR_SUFFIXES = '.dist-info', '.egg-info', 'EGG-INFO',
 
+# match the METADATA file of the single .dist-info directory at the root of a
+# wheel, as in "click-8.0.1.dist-info/METADATA"
+wheel_metadata_path = re.compile(r'[^/]+\.dist-info/METADATA$')
+
+# match the PKG-INFO file of a top-level metadata directory in an egg, as in
+# "EGG-INFO/PKG-INFO"
+egg_pkginfo_path = re.compile(r'[^/]*(?:\.dist-info|\.egg-info|EGG-INFO)/PKG-INFO$')
+
+# buffer size used to read zip archives: a large buffer keeps the central
+# directory scan and the metadata reads in few IO calls
+ZIP_READ_BUFFER_SIZE = 1 << 20
+
 
 def parse_metadata(location, datasource_id, package_type):
     """
@@ -427,7 +464,50 @@ def parse_metadata(location, datasource_id, package_type):
     file ZipPath for a wheel)
 
     Looks in neighboring files as needed when an installed layout is found.
+    The same file is often parsed several times during a resolution session:
+    results are cached keyed by path and mtime when ``location`` is a plain
+    filesystem path. Callers get a shallow copy so that reassigning fields
+    (as the resolver does with dependencies) cannot corrupt the cache.
+    """
+    if isinstance(location, (str, Path)):
+        mtime_ns = get_mtime_ns(location)
+        if mtime_ns is not None:
+            return copy.copy(
+                _parse_metadata_cached(
+                    location=str(location),
+                    mtime_ns=mtime_ns,
+                    datasource_id=datasource_id,
+                    package_type=package_type,
+                )
+            )
+    return _parse_metadata(
+        location=location,
+        datasource_id=datasource_id,
+        package_type=package_type,
+    )
+
+
+def get_mtime_ns(location):
     """
+    Return the st_mtime_ns of the file at ``location`` or None if it cannot be
+    stat-ed.
+    """
+    try:
+        return os.stat(str(location)).st_mtime_ns
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_metadata_cached(location, mtime_ns, datasource_id, package_type):
+    return _parse_metadata(
+        location=location,
+        datasource_id=datasource_id,
+        package_type=package_type,
+    )
+
+
+def _parse_metadata(location, datasource_id, package_type):
     path = location
     if not isinstance(location, (Path, ZipPath)):
         path = Path(location)
@@ -439,17 +519,65 @@ def parse_metadata(location, datasource_id, package_type):
 
     dist = importlib_metadata.PathDistribution(path)
 
-    meta = dist.metadata
+    if isinstance(location, ZipPath):
+        meta = read_zip_metadata(location)
+    else:
+        meta = dist.metadata
+
+    return build_package_data(
+        meta=meta,
+        dist=dist,
+        location=location,
+        datasource_id=datasource_id,
+        package_type=package_type,
+    )
+
+
+def parse_zip_metadata(location, datasource_id, package_type):
+    """
+    Return a PackageData from a metadata file at ``location``, a ZipPath
+    inside a wheel or egg. This is a fast path for the archive handlers: the
+    layout is known there, so the generic path checks of parse_metadata are
+    skipped and the metadata directory is always the parent.
+    """
+    dist = importlib_metadata.PathDistribution(location.parent)
+    meta = read_zip_metadata(location)
+    return build_package_data(
+        meta=meta,
+        dist=dist,
+        location=location,
+        datasource_id=datasource_id,
+        package_type=package_type,
+    )
+
 
+def read_zip_metadata(location):
+    """
+    Return an email message parsed from the in-zip metadata file at the
+    ``location`` ZipPath. The file is read only once from the already open
+    zip: each access to PathDistribution.metadata would re-read it.
+    """
+    return email.message_from_string(location.read_text(encoding='utf-8'))
+
+
+def build_package_data(meta, dist, location, datasource_id, package_type):
+    """
+    Return a PackageData built from a parsed ``meta`` metadata message and a
+    ``dist`` importlib_metadata Distribution for the file at ``location``.
+    """
     name = get_attribute(meta, 'Name')
     version = get_attribute(meta, 'Version')
 
     urls, extra_data = get_urls(metainfo=meta, name=name, version=version)
 
-    dependencies = get_dist_dependencies(dist)
+    dependencies = get_dist_dependencies(dist, metadata=meta)
 
     file_references = list(get_file_references(dist))
 
+    # extract the classifiers once: they feed both the declared license and
+    # the keywords
+    license_classifiers, other_classifiers = get_classifiers(meta)
+
     package_data = models.PackageData(
         datasource_id=datasource_id,
         type=package_type,
@@ -458,8 +586,8 @@ def parse_metadata(location, datasource_id, package_type):
         version=version,
         description=get_description(metainfo=meta, location=str(location)),
         #TODO: https://github.com/aboutcode-org/scancode-toolkit/issues/3014
-        declared_license=get_declared_license(meta),
-        keywords=get_keywords(meta),
+        declared_license=get_declared_license(meta, license_classifiers=license_classifiers),
+        keywords=get_keywords(meta, other_classifiers=other_classifiers),
         parties=get_parties(meta),
         dependencies=dependencies,
         file_references=file_references,
@@ -521,16 +649,16 @@ class PypiWheelHandler(BasePypiHandler):
 
     @classmethod
     def parse(cls, location):
-        with zipfile.ZipFile(location) as zf:
-            for path in ZipPath(zf).iterdir():
-                if not path.name.endswith(META_DIR_SUFFIXES):
-                    continue
-                for metapath in path.iterdir():
-                    if not metapath.name.endswith('METADATA'):
+        # scan the zip central directory names only once rather than walking
+        # ZipPath dirs: we only need the .dist-info/METADATA entry
+        with open(location, 'rb', buffering=ZIP_READ_BUFFER_SIZE) as inp:
+            with zipfile.ZipFile(inp) as zf:
+                for name in zf.namelist():
+                    if not wheel_metadata_path.match(name):
                         continue
 
-                    yield parse_metadata(
-                        location=metapath,
+                    yield parse_zip_metadata(
+                        location=ZipPath(zf, at=name),
                         datasource_id=cls.datasource_id,
                         package_type=cls.default_package_type,
                     )
@@ -547,17 +675,16 @@ class PypiEggHandler(BasePypiHandler):
 
     @classmethod
     def parse(cls, location):
-        with zipfile.ZipFile(location) as zf:
-            for path in ZipPath(zf).iterdir():
-                if not path.name.endswith(META_DIR_SUFFIXES):
-                    continue
-
-                for metapath in path.iterdir():
-                    if not metapath.name.endswith('PKG-INFO'):
+        # scan the zip central directory names only once rather than walking
+        # ZipPath dirs: we only need the top-level PKG-INFO entry
+        with open(location, 'rb', buffering=ZIP_READ_BUFFER_SIZE) as inp:
+            with zipfile.ZipFile(inp) as zf:
+                for name in zf.namelist():
+                    if not egg_pkginfo_path.match(name):
                         continue
 
-                    yield parse_metadata(
-                        location=metapath,
+                    yield parse_zip_metadata(
+                        location=ZipPath(zf, at=name),
                         datasource_id=cls.datasource_id,
                         package_type=cls.default_package_type,
                     )
@@ -590,6 +717,7 @@ class PypiSdistArchiveHandler(BasePypiHandler):
         name = sdist.name
         version = sdist.version
         urls, extra_data = get_urls(metainfo=sdist, name=name, version=version)
+        license_classifiers, other_classifiers = get_classifiers(sdist)
 
         yield models.PackageData(
             datasource_id=cls.datasource_id,
@@ -598,8 +726,8 @@ class PypiSdistArchiveHandler(BasePypiHandler):
             name=name,
             version=version,
             description=get_description(sdist, location=location),
-            declared_license=get_declared_license(sdist),
-            keywords=get_keywords(sdist),
+            declared_license=get_declared_license(sdist, license_classifiers=license_classifiers),
+            keywords=get_keywords(sdist, other_classifiers=other_classifiers),
             parties=get_parties(sdist),
             extra_data=extra_data,
             **urls,
@@ -633,6 +761,8 @@ class PythonSetupPyHandler(BaseExtractedPythonLayout):
         python_requires = get_setup_py_python_requires(setup_args)
         extra_data.update(python_requires)
 
+        license_classifiers, other_classifiers = get_classifiers(setup_args)
+
         yield models.PackageData(
             datasource_id=cls.datasource_id,
             type=cls.default_package_type,
@@ -641,9 +771,9 @@ class PythonSetupPyHandler(BaseExtractedPythonLayout):
             version=version,
             description=get_description(setup_args),
             parties=get_setup_parties(setup_args),
-            declared_license=get_declared_license(setup_args),
+            declared_license=get_declared_license(setup_args, license_classifiers=license_classifiers),
             dependencies=dependencies,
-            keywords=get_keywords(setup_args),
+            keywords=get_keywords(setup_args, other_classifiers=other_classifiers),
             extra_data=extra_data,
             **urls,
         )
@@ -708,50 +838,69 @@ class SetupCfgHandler(BaseExtractedPythonLayout):
 
     @classmethod
     def parse(cls, location):
-        file_name = fileutils.file_name(location)
+        with open(location) as f:
+            config = f.read()
 
+        # the quick scan is only trusted when it can match ConfigParser
+        # semantics: interpolation, continuation lines, mixed-case option
+        # names and [DEFAULT] fallbacks all need the real parser
         metadata = {}
-        parser = ConfigParser()
+        metadata_section = get_setup_cfg_metadata_section(config)
+        if (
+            metadata_section
+            and '[DEFAULT]' not in config
+            and is_simple_setup_cfg_metadata(metadata_section.group(1))
+        ):
+            metadata = dict(find_setup_cfg_metadata_values(metadata_section.group(1)))
+
         dependent_packages = []
-        with open(location) as f:
-            parser.read_file(f)
-        for section in parser.values():
-            if section.name == 'options':
-                scope_by_sub_section = {
-                    "install_requires": "install",
-                    "tests_require": "test",
-                    "setup_requires": "setup",
-                    "python_requires": "python",
-                }
-                for sub_section, scope in scope_by_sub_section.items():
-                    if sub_section not in section:
-                        continue
-                    if scope != "python":
+
+        # a full ConfigParser pass is only needed for the dependency sections,
+        # or as a fallback when the quick metadata scan came up empty
+        needs_config_parser = (
+            '[options' in config
+            or ('[metadata]' in config and not metadata)
+        )
+        if needs_config_parser:
+            parser = ConfigParser()
+            parser.read_string(config)
+            for section in parser.values():
+                if section.name == 'options':
+                    scope_by_sub_section = {
+                        "install_requires": "install",
+                        "tests_require": "test",
+                        "setup_requires": "setup",
+                        "python_requires": "python",
+                    }
+                    for sub_section, scope in scope_by_sub_section.items():
+                        if sub_section not in section:
+                            continue
+                        if scope != "python":
+                            reqs = list(get_requirement_from_section(section=section, sub_section=sub_section))
+                            dependent_packages.extend(cls.parse_reqs(reqs, scope))
+                            continue
+                        python_requires_specifier = section[sub_section]
+                        pd = create_dependency_for_python_requires(python_requires_specifier)
+                        dependent_packages.append(pd)
+
+                if section.name == "options.extras_require":
+                    for sub_section in section:
                         reqs = list(get_requirement_from_section(section=section, sub_section=sub_section))
-                        dependent_packages.extend(cls.parse_reqs(reqs, scope))
-                        continue
-                    python_requires_specifier = section[sub_section]
-                    pd = create_dependency_for_python_requires(python_requires_specifier)
-                    dependent_packages.append(pd)
-
-            if section.name == "options.extras_require":
-                for sub_section in section:
-                    reqs = list(get_requirement_from_section(section=section, sub_section=sub_section))
-                    dependent_packages.extend(cls.parse_reqs(reqs, sub_section))
-            if section.name == 'metadata':
-                options = (
-                    'name',
-                    'version',
-                    'license',
-                    'url',
-                    'author',
-                    'author_email',
-                )
-                for name in options:
-                    content = section.get(name)
-                    if not content:
-                        continue
-                    metadata[name] = content
+                        dependent_packages.extend(cls.parse_reqs(reqs, sub_section))
+                if section.name == 'metadata' and not metadata:
+                    options = (
+                        'name',
+                        'version',
+                        'license',
+                        'url',
+                        'author',
+                        'author_email',
+                    )
+                    for name in options:
+                        content = section.get(name)
+                        if not content:
+                            continue
+                        metadata[name] = content
 
         parties = []
         author = metadata.get('author')
@@ -784,11 +933,10 @@ class SetupCfgHandler(BaseExtractedPythonLayout):
         """
         dependent_packages = []
         for req in reqs:
-            req_parsed = packaging.requirements.Requirement(str(req))
+            req_parsed = build_requirement(str(req))
             name = canonicalize_name(req_parsed.name)
             purl = PackageURL(type="pypi", name=name)
-            specifiers = req_parsed.specifier._specs
-            resolved_purl = get_resolved_purl(purl=purl, specifiers=specifiers)
+            resolved_purl = get_resolved_purl(purl=purl, specifiers=req_parsed.specifier)
             dependent_packages.append(
                         models.DependentPackage(
                         purl=str(resolved_purl.purl),
@@ -802,6 +950,20 @@ class SetupCfgHandler(BaseExtractedPythonLayout):
         return dependent_packages
 
 
+@functools.lru_cache(maxsize=4096)
+def format_pypi_purl(name, version=None):
+    """
+    Return a "pkg:pypi" purl string for a ``name`` and an optional ``version``.
+    This is a fast path equivalent to building a PackageURL with no qualifiers
+    and no subpath and calling to_string(): the same requirements repeat across
+    the files of a codebase, so results are cached.
+    """
+    name = quote(name.lower().replace('_', '-'), safe='')
+    if version:
+        return f'pkg:pypi/{name}@{quote(str(version), safe="")}'
+    return f'pkg:pypi/{name}'
+
+
 def get_resolved_purl(purl: PackageURL, specifiers: SpecifierSet):
     """
     Check if the purl is resolved and return a ResolvedPurl.
@@ -809,7 +971,7 @@ def get_resolved_purl(purl: PackageURL, specifiers: SpecifierSet):
     """
     is_resolved = False
     if len(specifiers) == 1:
-        specifier = list(specifiers)[0]
+        specifier = next(iter(specifiers))
         if specifier.operator in ('==', '==='):
             is_resolved = True
             purl = purl._replace(version=specifier.version)
@@ -840,17 +1002,17 @@ class PipfileLockHandler(BaseDependencyFileHandler):
         with open(location) as f:
             content = f.read()
 
-        data = json.loads(content)
-
+        # there is no need to parse a possibly large JSON only to get the
+        # _meta hash
         sha256 = None
-        if '_meta' in data:
-            for name, meta in data['_meta'].items():
-                if name == 'hash':
-                    sha256 = meta.get('sha256')
+        match = find_pipfile_lock_sha256(content)
+        if match:
+            sha256 = match.group(1)
 
         dependent_packages = parse_with_dparse2(
             location=location,
             file_name='Pipfile.lock',
+            content=content,
         )
 
         yield models.PackageData(
@@ -976,6 +1138,42 @@ def get_requirements_txt_dependencies(location, include_nested=False):
     return dependent_packages, extra_data
 
 
+def parse_many(handler, locations, max_workers=None):
+    """
+    Yield PackageData objects parsed by the ``handler`` DatafileHandler class
+    from each location in a ``locations`` iterable of paths, in completion
+    order. Each location is an independent, mostly CPU-bound parse (AST, zip
+    and email parsing), so the work is spread over ``max_workers`` processes
+    defaulting to the CPU count. Fall back to threads where process forking
+    is not available (such as Windows) as the spawn overhead would dominate
+    these short jobs.
+    """
+    locations = list(locations)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        executor_class = ProcessPoolExecutor
+    else:
+        executor_class = ThreadPoolExecutor
+
+    with executor_class(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(parse_one, handler, location)
+            for location in locations
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def parse_one(handler, location):
+    """
+    Return a list of PackageData parsed by the ``handler`` from the file at
+    ``location``. This is the (picklable) unit of work of parse_many.
+    """
+    return list(handler.parse(location))
+
+
 def can_process_dependent_package(dep: models.DependentPackage):
     """
     Return True if we can process the dependent package
@@ -1008,34 +1206,39 @@ def get_attribute(metainfo, name, multiple=False):
 
     # Because of that, the key can be obtained as a plain named attribute,
     # either as-is or lowercased (and with dash replaced by dunder) or we
-    # can use a get on dicts of emails.
-
-    def attr_getter(_aname, default):
-        _aname = _aname.replace('-', '_')
-        return (
-            getattr(metainfo, _aname, default)
-            or getattr(metainfo, _aname.lower(), default)
-        )
-
-    def item_getter(_iname, getter, default):
-        getter = getattr(metainfo, getter, None)
-        if getter:
-            return getter(_iname, default) or getter(_iname.lower(), default)
-        return default
+    # can use a get on dicts of emails. We dispatch on the metainfo type so
+    # each call runs exactly one probe sequence.
+
+    if isinstance(metainfo, dict):
+        value = metainfo.get(name) or metainfo.get(name.lower())
+        return value or ([] if multiple else None)
+
+    if isinstance(metainfo, email.message.Message):
+        # the Message accessors are case-insensitive
+        if multiple:
+            return metainfo.get_all(name, []) or []
+        return metainfo.get(name) or None
+
+    # a pkginfo Distribution or similar object with plain attributes
+    aname = name.replace('-', '_')
+    value = (
+        getattr(metainfo, aname, None)
+        or getattr(metainfo, aname.lower(), None)
+    )
+    if value:
+        return value
 
+    # last resort: an object exposing a mapping-like get/get_all protocol
     if multiple:
-        return (
-            attr_getter(name, [])
-            or item_getter(name, 'get_all', [])
-            or item_getter(name, 'get', [])
-            or []
-        )
-    else:
-        return (
-            attr_getter(name, None)
-            or item_getter(name, 'get', None)
-            or None
-        )
+        getter = getattr(metainfo, 'get_all', None)
+        if getter:
+            value = getter(name, None) or getter(name.lower(), None)
+            if value:
+                return value
+    getter = getattr(metainfo, 'get', None)
+    if getter:
+        value = getter(name, None) or getter(name.lower(), None)
+    return value or ([] if multiple else None)
 
 
 def get_description(metainfo, location=None):
@@ -1059,6 +1262,52 @@ def get_description(metainfo, location=None):
     return build_description(summary, description)
 
 
+# some metadata formats pad each description line with 8 spaces
+description_space_padding = ' ' * 8
+
+# strip the 8-space padding at the start of each padded line in one pass
+strip_description_padding = re.compile(r'(?m)^ {8}').sub
+
+# split a comma-separated Keywords value, eating the surrounding whitespace
+split_keywords = re.compile(r'\s*,\s*').split
+
+# cheap probe for a setup() or main() call before paying for an AST parse
+has_setup_call = re.compile(r'\b(?:setup|main)\s*\(').search
+
+# slice the [metadata] section out of a setup.cfg and collect its simple
+# single-line values without paying for a full ConfigParser pass
+get_setup_cfg_metadata_section = re.compile(r'(?ms)^\[metadata\][ \t]*\r?\n(.*?)(?=^\[|\Z)').search
+find_setup_cfg_metadata_values = re.compile(
+    r'(?m)^(name|version|license|url|author|author_email)[ \t]*[=:][ \t]*(\S.*?)[ \t]*$'
+).findall
+
+# a continuation or indented option line, which only ConfigParser handles
+has_setup_cfg_indented_line = re.compile(r'(?m)^[ \t]+\S').search
+# the option names of a section, in whatever case they are written
+find_setup_cfg_option_names = re.compile(r'(?m)^([A-Za-z_][A-Za-z0-9_.-]*)[ \t]*[=:]').findall
+
+
+def is_simple_setup_cfg_metadata(section_text):
+    """
+    Return True if the setup.cfg [metadata] ``section_text`` is plain enough
+    for the quick regex scan to match ConfigParser semantics: no value
+    interpolation, no continuation or indented lines and only lowercase
+    option names.
+    """
+    if '%(' in section_text:
+        return False
+    if has_setup_cfg_indented_line(section_text):
+        return False
+    return all(
+        name == name.lower()
+        for name in find_setup_cfg_option_names(section_text)
+    )
+
+# find the _meta hash of a Pipfile.lock: this is the only "sha256" JSON
+# key/value pair (the per-package hashes are plain "sha256:..." strings)
+find_pipfile_lock_sha256 = re.compile(r'"sha256"\s*:\s*"([0-9a-f]{64})"').search
+
+
 def clean_description(description):
     """
     Return a cleaned description text, removing extra leading whitespaces if
@@ -1068,21 +1317,25 @@ def clean_description(description):
     # TODO: verify what is the impact of Description-Content-Type: if any
     description = description or ''
     description = description.strip()
-    lines = description.splitlines(False)
-
-    space_padding = ' ' * 8
 
-    # we need cleaning if any of the first two lines starts with 8 spaces
-    need_cleaning = any(l.startswith(space_padding) for l in lines[:2])
+    # normalize line endings as splitlines used to, so the padding test and
+    # strip see plain newlines; the original text is returned untouched when
+    # no cleaning is needed
+    normalized = description
+    if '\r' in description:
+        normalized = description.replace('\r\n', '\n').replace('\r', '\n')
+
+    # we need cleaning if the second line starts with 8 spaces: the first line
+    # cannot since we just stripped leading whitespace
+    newline = normalized.find('\n')
+    need_cleaning = (
+        newline != -1
+        and normalized.startswith(description_space_padding, newline + 1)
+    )
     if not need_cleaning:
         return description
 
-    cleaned_lines = [
-        line[8:] if line.startswith(space_padding) else line
-        for line in lines
-    ]
-
-    return '\n'.join(cleaned_lines)
+    return strip_description_padding('', normalized)
 
 
 def get_legacy_description(location):
@@ -1095,10 +1348,11 @@ def get_legacy_description(location):
             return i.read()
 
 
-def get_declared_license(metainfo):
+def get_declared_license(metainfo, license_classifiers=None):
     """
     Return a mapping of declared license information found in a ``metainfo``
-    object or mapping.
+    object or mapping. Use an optional ``license_classifiers`` list of already
+    extracted license classifiers to avoid scanning the classifiers twice.
     """
     declared_license = {}
     # TODO: We should make the declared license as it is, this should be
@@ -1107,7 +1361,8 @@ def get_declared_license(metainfo):
     if lic and not lic == 'UNKNOWN':
         declared_license['license'] = lic
 
-    license_classifiers, _ = get_classifiers(metainfo)
+    if license_classifiers is None:
+        license_classifiers, _ = get_classifiers(metainfo)
     if license_classifiers:
         declared_license['classifiers'] = license_classifiers
     return declared_license
@@ -1128,24 +1383,28 @@ def get_classifiers(metainfo):
 
     license_classifiers = []
     other_classifiers = []
+    append_license = license_classifiers.append
+    append_other = other_classifiers.append
     for classifier in classifiers:
         if classifier:
             if classifier.startswith('License'):
-                license_classifiers.append(classifier)
+                append_license(classifier)
             else:
-                other_classifiers.append(classifier)
+                append_other(classifier)
     return license_classifiers, other_classifiers
 
 
-def get_keywords(metainfo):
+def get_keywords(metainfo, other_classifiers=None):
     """
-    Return a list of keywords found in a ``metainfo`` object or mapping.
+    Return a list of keywords found in a ``metainfo`` object or mapping. Use an
+    optional ``other_classifiers`` list of already extracted non-license
+    classifiers to avoid scanning the classifiers twice.
     """
     keywords = []
     kws = get_attribute(metainfo, 'Keywords') or []
     if kws:
         if isinstance(kws, str):
-            kws = kws.split(',')
+            kws = split_keywords(kws)
         elif isinstance(kws, (list, tuple)):
             pass
         else:
@@ -1153,8 +1412,8 @@ def get_keywords(metainfo):
         kws = [k.strip() for k in kws if k and k.strip()]
         keywords.extend(kws)
 
-    # we are calling this again and ignoring licenses
-    _, other_classifiers = get_classifiers(metainfo)
+    if other_classifiers is None:
+        _, other_classifiers = get_classifiers(metainfo)
     keywords.extend(other_classifiers)
     return keywords
 
@@ -1264,15 +1523,22 @@ def is_simple_requires(requires):
     )
 
 
-def get_dist_dependencies(dist):
+def get_dist_dependencies(dist, metadata=None):
     """
     Return a list of DependentPackage found in a ``dist`` Distribution object or
-    an empty list.
+    an empty list. Use an optional already parsed ``metadata`` message to avoid
+    re-reading the metadata file.
     """
     # we treat extras as scopes
-    # TODO: use these for verification?
-    scopes = dist.metadata.get_all('Provides-Extra') or []
-    return get_requires_dependencies(requires=dist.requires)
+    # TODO: use the Provides-Extra values for verification?
+    requires = None
+    if metadata is not None:
+        requires = metadata.get_all('Requires-Dist')
+    if not requires:
+        # this also covers the egg layouts where the requires may live in a
+        # separate requires.txt file
+        requires = dist.requires
+    return get_requires_dependencies(requires=requires)
 
 
 def get_requires_dependencies(requires, default_scope='install'):
@@ -1285,18 +1551,15 @@ def get_requires_dependencies(requires, default_scope='install'):
         return []
     dependent_packages = []
     for req in (requires or []):
-        req = Requirement(req)
+        req = build_requirement(req)
         name = canonicalize_name(req.name)
         is_resolved = False
-        purl = PackageURL(type='pypi', name=name)
+        version = None
         # note: packaging.requirements.Requirement.specifier is a
-        # packaging.specifiers.SpecifierSet object and a SpecifierSet._specs is
-        # a set of either: packaging.specifiers.Specifier or
-        # packaging.specifiers.LegacySpecifier and each of these have a
-        # .operator and .version property
-        # a packaging.specifiers.SpecifierSet
-        specifiers_set = req.specifier  # a list of packaging.specifiers.Specifier
-        specifiers = specifiers_set._specs
+        # packaging.specifiers.SpecifierSet that iterates as Specifier or
+        # LegacySpecifier objects, each with a .operator and .version property
+        specifiers_set = req.specifier
+        specifiers = tuple(specifiers_set)
         requirement = None
         if specifiers:
             # SpecifierSet stringifies to comma-separated sorted Specifiers
@@ -1304,17 +1567,17 @@ def get_requires_dependencies(requires, default_scope='install'):
             # are we pinned e.g. resolved? this is true if we have a single
             # equality specifier
             if len(specifiers) == 1:
-                specifier = list(specifiers)[0]
+                specifier = specifiers[0]
                 if specifier.operator in ('==', '==='):
                     is_resolved = True
-                    purl = purl._replace(version=specifier.version)
+                    version = specifier.version
 
         # we use the extra as scope if avialble
         scope = get_extra(req.marker) or default_scope
 
         dependent_packages.append(
             models.DependentPackage(
-                purl=purl.to_string(),
+                purl=format_pypi_purl(name, version),
                 scope=scope,
                 is_runtime=True,
                 is_optional=False,
@@ -1368,14 +1631,16 @@ def get_dparse2_supported_file_name(file_name):
             return file_name
 
 
-def parse_with_dparse2(location, file_name=None):
+def parse_with_dparse2(location, file_name=None, content=None):
     """
     Return a list of DependentPackage built from a dparse2-supported dependency
     manifest such as Conda manifest or Pipfile.lock files, or return an empty
-    list.
+    list. Use an optional already read ``content`` string to avoid re-reading
+    the file at ``location``.
     """
-    with open(location) as f:
-        content = f.read()
+    if content is None:
+        with open(location) as f:
+            content = f.read()
 
     dep_file = dparse2.parse(content, file_name=file_name)
     if not dep_file:
@@ -1386,33 +1651,28 @@ def parse_with_dparse2(location, file_name=None):
     for dependency in dep_file.dependencies:
         requirement = dependency.name
         is_resolved = False
-        purl = PackageURL(type='pypi', name=dependency.name)
+        version = None
 
         # note: dparse2.dependencies.Dependency.specs comes from
-        # packaging.requirements.Requirement.specifier
-        # which in turn is a packaging.specifiers.SpecifierSet objects
-        # and a SpecifierSet._specs is a set of either:
-        # packaging.specifiers.Specifier or packaging.specifiers.LegacySpecifier
-        # and each of these have a .operator and .version property
-
-        # a packaging.specifiers.SpecifierSet
+        # packaging.requirements.Requirement.specifier which in turn is a
+        # packaging.specifiers.SpecifierSet that iterates as Specifier or
+        # LegacySpecifier objects, each with a .operator and .version property
         specifiers_set = dependency.specs
-        # a list of packaging.specifiers.Specifier
-        specifiers = specifiers_set._specs
+        specifiers = tuple(specifiers_set)
 
         if specifiers:
             # SpecifierSet stringifies to comma-separated sorted Specifiers
             requirement = str(specifiers_set)
             # are we pinned e.g. resolved?
             if len(specifiers) == 1:
-                specifier = list(specifiers)[0]
+                specifier = specifiers[0]
                 if specifier.operator in ('==', '==='):
                     is_resolved = True
-                    purl = purl._replace(version=specifier.version)
+                    version = specifier.version
 
         dependent_packages.append(
             models.DependentPackage(
-                purl=purl.to_string(),
+                purl=format_pypi_purl(dependency.name, version),
                 # are we always this scope? what if we have requirements-dev.txt?
                 scope='install',
                 is_runtime=True,
@@ -1450,6 +1710,122 @@ def is_setup_call(statement):
     )
 
 
+class SetupCallFound(Exception):
+    """
+    Raised to stop an AST traversal at the first setup() call, wrapping the
+    found Call node.
+    """
+
+    def __init__(self, call):
+        super().__init__()
+        self.call = call
+
+
+class SetupCallVisitor(ast.NodeVisitor):
+    """
+    An AST visitor that raises SetupCallFound at the first call to setup() or
+    main() so the traversal does not continue past it.
+    """
+
+    def visit_Call(self, node):
+        func = node.func
+        if (
+            # we look for setup and main as this is used sometimes instead of setup()
+            (isinstance(func, ast.Name) and func.id in ('setup', 'main'))
+            or
+            # we also look for setuptools.setup when used instead of setup()
+            (
+                isinstance(func, ast.Attribute)
+                and func.attr == 'setup'
+                and isinstance(func.value, ast.Name)
+                and func.value.id == 'setuptools'
+            )
+        ):
+            raise SetupCallFound(node)
+        self.generic_visit(node)
+
+
+def find_setup_call(tree):
+    """
+    Return the first setup() or main() Call node found in the AST ``tree`` or
+    None.
+    """
+    try:
+        SetupCallVisitor().visit(tree)
+    except SetupCallFound as found:
+        return found.call
+
+
+def extract_constant_value(node, include_not_parsable=False):
+    """
+    Return the value of a constant AST ``node``.
+    """
+    return node.value
+
+
+def extract_sequence_values(node, include_not_parsable=False):
+    """
+    Return the values of the plain constant elements of a list, tuple or set
+    AST ``node``, ignoring computed elements such as function calls.
+    """
+    return [
+        elt.value for elt in node.elts
+        if isinstance(elt, ast.Constant)
+    ]
+
+
+def extract_mapping_values(node, include_not_parsable=False):
+    """
+    Return a mapping built from a dict AST ``node``. We only collect simple
+    name/value and name/[values] constructs.
+    """
+    keys = [elt.value for elt in node.keys]
+    values = []
+    for val in node.values:
+        extract = setup_arg_extractors.get(type(val))
+        if extract is not None:
+            values.append(extract(val, include_not_parsable))
+        elif include_not_parsable:
+            value = extract_not_parsable_value(val)
+            if value is not None:
+                values.append(value)
+    return dict(zip(keys, values))
+
+
+def extract_not_parsable_value(node):
+    """
+    Return a best effort value for a computed AST ``node``: the attribute or
+    variable name for references, a literal evaluation otherwise, or None for
+    function calls, comprehensions and subscripts.
+    """
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, (ast.Call, ast.ListComp, ast.Subscript,)):
+        return None
+    # we used to consider only plain strings: instead use literal_eval and
+    # ignore failures, skipping only function calls this way we can get more
+    # things such as boolean and numbers
+    try:
+        return ast.literal_eval(node)
+    except Exception as e:
+        if TRACE:
+            logger_debug('get_setup_py_args: failed:', e)
+        return str(node)
+
+
+# dispatch by concrete AST node type: one dict lookup replaces a chain of
+# isinstance checks for every setup() keyword argument
+setup_arg_extractors = {
+    ast.Constant: extract_constant_value,
+    ast.List: extract_sequence_values,
+    ast.Tuple: extract_sequence_values,
+    ast.Set: extract_sequence_values,
+    ast.Dict: extract_mapping_values,
+}
+
+
 def get_setup_py_args_legacy(location, include_not_parsable=False):
     """
     Return a mapping of arguments passed to a setup.py setup() function. Also
@@ -1461,95 +1837,37 @@ def get_setup_py_args_legacy(location, include_not_parsable=False):
 
     setup_args = {}
 
-    # Parse setup.py file and traverse the AST
-    tree = ast.parse(setup_text)
-    for statement in tree.body:
-        # We only care about function calls or assignments to functions named
-        # `setup` or `main`
+    if not has_setup_call(setup_text):
+        return setup_args
+
+    # Parse setup.py file and stop traversing the AST at the first call to a
+    # function named `setup` or `main`
 
-        # TODO: also collect top level variables assigned later as arguments values
-        if not is_setup_call(statement):
+    # TODO: also collect top level variables assigned later as arguments values
+    call = find_setup_call(ast.parse(setup_text))
+    if call is None:
+        return setup_args
+
+    # Process the arguments to the setup function through the extractors
+    # dispatch table
+    for kw in call.keywords:
+        # a keyword without a name is a **kwargs unpacking: skip it rather
+        # than storing its value under a None key
+        if kw.arg is None:
             continue
+        arg_name = kw.arg
+        arg_value = kw.value
 
-        # Process the arguments to the setup function
-        for kw in getattr(statement.value, 'keywords', []):
-            arg_name = kw.arg
-            arg_value = kw.value
+        extract = setup_arg_extractors.get(type(arg_value))
+        if extract is not None:
+            setup_args[arg_name] = extract(arg_value, include_not_parsable)
 
-            # FIXME: use a recursive function to extract structured data
+        elif include_not_parsable:
+            value = extract_not_parsable_value(arg_value)
+            if value is not None:
+                setup_args[arg_name] = value
 
-            if isinstance(arg_value, (ast.List, ast.Tuple, ast.Set,)):
-                # We collect the elements of a list if the element
-                # and tag function calls
-                val = [
-                    elt.s for elt in arg_value.elts
-                    if not isinstance(elt, ast.Call)
-                ]
-                setup_args[arg_name] = val
-
-            elif isinstance(arg_value, ast.Dict):
-                # we only collect simple name/value and name/[values] constructs
-                keys = [elt.value for elt in arg_value.keys]
-                values = []
-                for val in arg_value.values:
-
-                    if isinstance(val, (ast.List, ast.Tuple, ast.Set,)):
-                        val = [
-                            elt.s for elt in val.elts
-                            if not isinstance(elt, ast.Call)
-                        ]
-                        values.append(val)
-
-                    elif isinstance(val, (ast.Str, ast.Constant,)):
-                        values.append(val.s)
-
-                    else:
-                        if include_not_parsable:
-                            if isinstance(val, ast.Attribute):
-                                values.append(val.attr)
-
-                            elif isinstance(val, ast.Name):
-                                values.append(val.id)
-
-                            elif not isinstance(val, (ast.Call, ast.ListComp, ast.Subscript)):
-                                # we used to consider only isinstance(val, ast.Str):
-                                # instead use literal_eval and ignore failures, skipping
-                                # only function calls this way we can get more things such
-                                # as boolean and numbers
-                                try:
-                                    values.append(ast.literal_eval(val.value))
-                                except Exception as e:
-                                    if TRACE:
-                                        logger_debug('get_setup_py_args: failed:', e)
-                                    values.append(str(val.value))
-
-                mapping = dict(zip(keys, values))
-                setup_args[arg_name] = mapping
-
-            elif isinstance(arg_value, (ast.Str, ast.Constant,)):
-                setup_args[arg_name] = arg_value.s
-            else:
-                if include_not_parsable:
-                    if isinstance(arg_value, ast.Attribute):
-                        setup_args[arg_name] = arg_value.attr
-
-                    elif isinstance(arg_value, ast.Name):
-                        if arg_name:
-                            setup_args[arg_name] = arg_value.id
-
-                    elif not isinstance(arg_value, (ast.Call, ast.ListComp, ast.Subscript,)):
-                        # we used to consider only isinstance(kw.value, ast.Str):
-                        # instead use literal_eval and ignore failures, skipping only
-                        # function calls this way we can get more things such as boolean
-                        # and numbers
-                        try:
-                            setup_args[arg_name] = ast.literal_eval(arg_value)
-                        except Exception as e:
-                            if TRACE:
-                                logger_debug('get_setup_py_args: failed:', e)
-                            setup_args[arg_name] = str(arg_value)
-
-            # TODO:  an expression like a call to version=get_version or version__version__
+        # TODO:  an expression like a call to version=get_version or version__version__
 
     return setup_args
 
@@ -1558,16 +1876,47 @@ def get_setup_py_args(location, include_not_parsable=False):
     """
     Return a mapping of arguments passed to a setup.py setup() function. Also
     include not parsable identifiers values such as variable name and attribute
-    references if ``include_not_parsable`` is True
+    references if ``include_not_parsable`` is True.
+    The mapping is cached keyed by path and mtime: treat it as read-only.
     """
+    from _packagedcode.pypi_setup_py import parse_setup_py
+    mtime_ns = get_mtime_ns(location)
+    if mtime_ns is None:
+        return parse_setup_py(location)
+    return _get_setup_py_args_cached(str(location), mtime_ns)
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_setup_py_args_cached(location, mtime_ns):
     from _packagedcode.pypi_setup_py import parse_setup_py
     return parse_setup_py(location)
 
 
+def clear_caches():
+    """
+    Clear the parsing caches. Mostly useful in tests.
+    """
+    _parse_metadata_cached.cache_clear()
+    _get_setup_py_args_cached.cache_clear()
+    _read_version_file_cached.cache_clear()
+
+
 def get_pypi_urls(name, version):
     """
-    Return a mapping of computed Pypi URLs for this package
+    Return a mapping of computed Pypi URLs for this package.
+    The mapping is freshly built on each call and is safe to mutate; the
+    computed URL strings are cached and shared across calls.
     """
+    homepage, download, api = _compute_pypi_urls(name, version)
+    return dict(
+        repository_homepage_url=homepage,
+        repository_download_url=download,
+        api_data_url=api,
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _compute_pypi_urls(name, version):
     api_data_url = None
     if name and version:
         api_data_url = f'https://pypi.org/pypi/{name}/{version}/json'
@@ -1582,10 +1931,88 @@ def get_pypi_urls(name, version):
 
     repository_homepage_url = name and f'https://pypi.org/project/{name}'
 
-    return dict(
-        repository_homepage_url=repository_homepage_url,
-        repository_download_url=repository_download_url,
-        api_data_url=api_data_url,
+    return repository_homepage_url, repository_download_url, api_data_url
+
+
+# map a lowercased Project-URL type to the corresponding PackageData URL
+# attribute: one hash lookup classifies each URL
+project_url_attributes = {
+    'tracker': 'bug_tracking_url',
+    'bug reports': 'bug_tracking_url',
+    'github: issues': 'bug_tracking_url',
+    'bug tracker': 'bug_tracking_url',
+    'issues': 'bug_tracking_url',
+    'issue tracker': 'bug_tracking_url',
+
+    'source': 'code_view_url',
+    'source code': 'code_view_url',
+    'code': 'code_view_url',
+
+    'github': 'vcs_url',
+    'gitlab': 'vcs_url',
+    'github: repo': 'vcs_url',
+    'repository': 'vcs_url',
+
+    'website': 'homepage_url',
+    'homepage': 'homepage_url',
+    'home': 'homepage_url',
+}
+
+
+class UrlFields(NamedTuple):
+    """
+    The URL-bearing fields extracted from a package metainfo object.
+    """
+    homepage_url: str
+    project_urls: object
+    download_url: str
+
+
+def get_url_fields(metainfo):
+    """
+    Return a UrlFields for the ``metainfo`` object. An email Message (the
+    common case: wheel and sdist METADATA) is traversed once for all fields;
+    other metainfo shapes go through get_attribute per field.
+    """
+    if isinstance(metainfo, email.message.Message):
+        homepage = url = home = download = None
+        project_urls = []
+        for key, value in metainfo.items():
+            keyl = key.lower()
+            if keyl == 'home-page':
+                homepage = homepage or value
+            elif keyl == 'project-url':
+                project_urls.append(value)
+            elif keyl == 'download-url':
+                download = download or value
+            elif keyl == 'url':
+                url = url or value
+            elif keyl == 'home':
+                home = home or value
+        return UrlFields(
+            homepage_url=homepage or url or home,
+            project_urls=project_urls,
+            download_url=download,
+        )
+
+    homepage_url = (
+        get_attribute(metainfo, 'Home-page')
+        or get_attribute(metainfo, 'url')
+        or get_attribute(metainfo, 'home')
+    )
+    project_urls = (
+        get_attribute(metainfo, 'Project-URL', multiple=True)
+        or get_attribute(metainfo, 'project_urls')
+        or []
+    )
+    download_url = (
+        get_attribute(metainfo, 'Download-URL')
+        or get_attribute(metainfo, 'download_url')
+    )
+    return UrlFields(
+        homepage_url=homepage_url,
+        project_urls=project_urls,
+        download_url=download_url,
     )
 
 
@@ -1630,33 +2057,19 @@ def get_urls(metainfo, name, version):
     # Project-URL: Twine source
     # Project-URL: Say Thanks!
 
+    # each URL goes to ``urls`` under its PackageData attribute if that
+    # attribute is known and still unset, and to ``extra_data`` under its
+    # original type otherwise
     extra_data = {}
     urls = get_pypi_urls(name, version)
 
-    def add_url(_url, _utype=None, _attribute=None):
-        """
-        Add ``_url`` to ``urls`` as _``_attribute`` or to ``extra_data`` as
-        ``_utype`` if already defined or no ``_attribute`` is provided.
-        """
-        if _url:
-            if _attribute and _attribute not in urls:
-                urls[_attribute] = _url
-            elif _utype:
-                extra_data[_utype] = _url
+    # extract all the URL fields in one pass over the metainfo
+    fields = get_url_fields(metainfo)
 
-    # get first as this is the most common one
-    homepage_url = (
-        get_attribute(metainfo, 'Home-page')
-        or get_attribute(metainfo, 'url')
-        or get_attribute(metainfo, 'home')
-    )
-    add_url(homepage_url, _attribute='homepage_url')
+    if fields.homepage_url and 'homepage_url' not in urls:
+        urls['homepage_url'] = fields.homepage_url
 
-    project_urls = (
-        get_attribute(metainfo, 'Project-URL', multiple=True)
-        or get_attribute(metainfo, 'project_urls')
-        or []
-    )
+    project_urls = fields.project_urls
 
     if isinstance(project_urls, list):
         # these come from METADATA and we convert them back to a mapping
@@ -1667,40 +2080,94 @@ def get_urls(metainfo, name, version):
         }
     if isinstance(project_urls, dict):
         for utype, url in project_urls.items():
-            utypel = utype.lower()
-            if utypel in (
-                'tracker',
-                'bug reports',
-                'github: issues',
-                'bug tracker',
-                'issues',
-                'issue tracker',
-            ):
-                add_url(url, _utype=utype, _attribute='bug_tracking_url')
+            if not url:
+                continue
+            attribute = project_url_attributes.get(utype.strip().lower())
+            if attribute and attribute not in urls:
+                urls[attribute] = url
+            else:
+                extra_data[utype] = url
 
-            elif utypel in (
-                'source',
-                'source code',
-                'code',
-            ):
-                add_url(url, _utype=utype, _attribute='code_view_url')
+    # FIXME: this may not be the actual correct package download URL, so we keep this as an extra URL
+    if fields.download_url:
+        extra_data['Download-URL'] = fields.download_url
+
+    return urls, extra_data
 
-            elif utypel in ('github', 'gitlab', 'github: repo', 'repository'):
-                add_url(url, _utype=utype, _attribute='vcs_url')
 
-            elif utypel in ('website', 'homepage', 'home',):
-                add_url(url, _utype=utype, _attribute='homepage_url')
+# patterns used by the version detectors below: compiled once since the
+# detectors run for every candidate location of every scanned package. These
+# are byte patterns: the probed files are searched undecoded and only a
+# matched version string pays for a UTF-8 decode
+dunder_version_pattern = re.compile(rb"^__version__\s*=\s*['\"]([^'\"]*)['\"]", re.MULTILINE)
+plain_version_pattern = re.compile(rb"^version\s*=\s*['\"]([^'\"]*)['\"]", re.MULTILINE)
+setup_py_dunder_version_pattern = re.compile(rb"^\s*version\s*=\s*(.*__version__)", re.MULTILINE)
 
-            else:
-                add_url(url, _utype=utype)
 
-    # FIXME: this may not be the actual correct package download URL, so we keep this as an extra URL
-    download_url = get_attribute(metainfo, 'Download-URL')
-    if not download_url:
-        download_url = get_attribute(metainfo, 'download_url')
-    add_url(download_url, _utype='Download-URL')
+# version attributes live near the top of a module: probing only the first
+# 64 KiB bounds the worst-case read and scan regardless of file size
+VERSION_SCAN_WINDOW = 64 * 1024
 
-    return urls, extra_data
+# file names likely to hold a version attribute, in probing priority order:
+# these are both walked for and probed by detect_version_attribute
+special_version_file_names = (
+    '__init__.py',
+    '__main__.py',
+    '__version__.py',
+    '__about__.py',
+    '__version.py',
+    '_version.py',
+    'version.py',
+    'VERSION.py',
+    'package_data.py',
+)
+
+
+def read_version_file(location):
+    """
+    Return the first bytes of the file at ``location``, up to
+    VERSION_SCAN_WINDOW, caching by path and mtime. The version detectors
+    probe the same files repeatedly (once per pattern): the cache turns these
+    into a single read.
+    """
+    mtime_ns = get_mtime_ns(location)
+    if mtime_ns is None:
+        with open(location, 'rb') as fp:
+            return fp.read(VERSION_SCAN_WINDOW)
+    return _read_version_file_cached(str(location), mtime_ns)
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_version_file_cached(location, _mtime_ns):
+    with open(location, 'rb') as fp:
+        return fp.read(VERSION_SCAN_WINDOW)
+
+
+class SetupPyVersions(NamedTuple):
+    """
+    The version-bearing strings found in one scan of a setup.py file.
+    Each field is a matched string or None.
+    """
+    setup_version_arg: str
+    dunder_version: str
+    plain_version: str
+
+
+def scan_setup_py_versions(location):
+    """
+    Return a SetupPyVersions built by running all the version patterns over a
+    single read of the setup.py file at ``location``.
+    """
+    content = read_version_file(location)
+
+    def first_group(match):
+        return match.group(1).strip().decode('utf-8') if match else None
+
+    return SetupPyVersions(
+        setup_version_arg=first_group(setup_py_dunder_version_pattern.search(content)),
+        dunder_version=first_group(dunder_version_pattern.search(content)),
+        plain_version=first_group(plain_version_pattern.search(content)),
+    )
 
 
 def find_pattern(location, pattern):
@@ -1714,12 +2181,11 @@ def find_pattern(location, pattern):
     SPDX-License-Identifier: BSD-3-Clause
     (C) 2001-2020 Chris Liechti <cliechti@gmx.net>
     """
-    with open(location) as fp:
-        content = fp.read()
+    content = read_version_file(location)
 
-    match = re.search(pattern, content)
+    match = pattern.search(content)
     if match:
-        return match.group(1).strip()
+        return match.group(1).strip().decode('utf-8')
 
 
 def find_dunder_version(location):
@@ -1732,8 +2198,7 @@ def find_dunder_version(location):
     SPDX-License-Identifier: BSD-3-Clause
     (C) 2001-2020 Chris Liechti <cliechti@gmx.net>
     """
-    pattern = re.compile(r"^__version__\s*=\s*['\"]([^'\"]*)['\"]", re.MULTILINE)
-    match = find_pattern(location, pattern)
+    match = find_pattern(location, dunder_version_pattern)
     if TRACE: logger_debug('find_dunder_version:', 'location:', location, 'match:', match)
     return match
 
@@ -1743,8 +2208,7 @@ def find_plain_version(location):
     Return a plain version attribute string or None from searching the module
     file at `location`.
     """
-    pattern = re.compile(r"^version\s*=\s*['\"]([^'\"]*)['\"]", re.MULTILINE)
-    match = find_pattern(location, pattern)
+    match = find_pattern(location, plain_version_pattern)
     if TRACE: logger_debug('find_plain_version:', 'location:', location, 'match:', match)
     return match
 
@@ -1765,22 +2229,46 @@ def find_setup_py_dunder_version(location):
     SPDX-License-Identifier: BSD-3-Clause
     (C) 2001-2020 Chris Liechti <cliechti@gmx.net>
     """
-    pattern = re.compile(r"^\s*version\s*=\s*(.*__version__)", re.MULTILINE)
-    match = find_pattern(location, pattern)
+    match = find_pattern(location, setup_py_dunder_version_pattern)
     if TRACE:
         logger_debug('find_setup_py_dunder_version:', 'location:', location, 'match:', match)
     return match
 
 
+def iter_candidate_locations(setup_py_dir, segments, has_src):
+    """
+    Yield the candidate file paths under ``setup_py_dir`` that may hold the
+    version attribute of the dotted module path in the ``segments`` list,
+    covering the src/ layout too when ``has_src`` is True.
+    """
+    if not segments:
+        return
+
+    for name in special_version_file_names:
+        yield os.path.join(setup_py_dir, *segments, name)
+    if has_src:
+        for name in special_version_file_names:
+            yield os.path.join(setup_py_dir, 'src', *segments, name)
+
+    # the last segment may also be a module file named after it: one computed
+    # path serves both the flat and the src/ layouts
+    module_file = segments[:-1] + [segments[-1] + '.py']
+    yield os.path.join(setup_py_dir, *module_file)
+    if has_src:
+        yield os.path.join(setup_py_dir, 'src', *module_file)
+
+
 def detect_version_attribute(setup_location):
     """
     Return a detected version from a setup.py file at `location` if used as in
     a version argument of the setup() function.
     Also search for neighbor files for __version__ and common patterns.
     """
-    # search for possible dunder versions here and elsewhere
-    setup_version_arg = find_setup_py_dunder_version(setup_location)
-    setup_py__version = find_dunder_version(setup_location)
+    # search for possible dunder versions here and elsewhere, with a single
+    # read and scan of the setup.py file
+    versions = scan_setup_py_versions(setup_location)
+    setup_version_arg = versions.setup_version_arg
+    setup_py__version = versions.dunder_version
     if TRACE:
         logger_debug('    detect_version_attribute():', 'setup_location:', setup_location)
         logger_debug('      find_setup_py_dunder_version(): setup_version_arg:', repr(setup_version_arg),)
@@ -1806,84 +2294,85 @@ def detect_version_attribute(setup_location):
     if TRACE:
         logger_debug('    detect_version_attribute():', 'segments:', segments)
 
-    special_names = (
-        '__init__.py',
-        '__main__.py',
-        '__version__.py',
-        '__about__.py',
-        '__version.py',
-        '_version.py',
-        'version.py',
-        'VERSION.py',
-        'package_data.py',
-    )
-
-    setup_py_dir = fileutils.parent_directory(setup_location)
-    src_dir = os.path.join(setup_py_dir, 'src')
-    has_src = os.path.exists(src_dir)
+    # os.path.dirname rather than fileutils.parent_directory: same result
+    # minus the trailing slash, so the directory keys below match the
+    # os.path.dirname keys of the candidates
+    setup_py_dir = os.path.dirname(setup_location) or '.'
+
+    # one scandir per directory level replaces a stat syscall per candidate:
+    # existence is tested against these basename sets
+    present_names_by_dir = {}
+
+    def names_present_in(directory):
+        names = present_names_by_dir.get(directory)
+        if names is None:
+            try:
+                names = {entry.name for entry in os.scandir(directory)}
+            except OSError:
+                names = frozenset()
+            present_names_by_dir[directory] = names
+        return names
+
+    has_src = 'src' in names_present_in(setup_py_dir)
     if TRACE:
-        logger_debug('    detect_version_attribute():', 'src_dir:', src_dir)
         logger_debug('    detect_version_attribute():', 'has_src:', has_src)
 
-    candidate_locs = []
-
-    if segments:
-        for n in special_names:
-            candidate_locs.append(segments + [n])
-        if has_src:
-            for n in special_names:
-                candidate_locs.append(['src'] + segments + [n])
-
-        if len(segments) > 1:
-            heads = segments[:-1]
-            tail = segments[-1]
-            candidate_locs.append(heads + [tail + '.py'])
-            if has_src:
-                candidate_locs.append(['src'] + heads + [tail + '.py'])
-
-        else:
-            seg = segments[0]
-            candidate_locs.append([seg + '.py'])
-            if has_src:
-                candidate_locs.append(['src', seg + '.py'])
+    candidates = chain(
+        iter_candidate_locations(
+            setup_py_dir=setup_py_dir,
+            segments=segments,
+            has_src=has_src,
+        ),
+        get_module_scripts(
+            location=setup_py_dir,
+            max_depth=4,
+            interesting_names=special_version_file_names,
+        ),
+    )
 
+    # deduplicate (the assembled paths and the walked paths overlap) and keep
+    # only the candidates present in their directory: this costs one scandir
+    # per distinct directory instead of one stat per candidate
     candidate_locs = [
-        os.path.join(setup_py_dir, *cand_loc_segs)
-        for cand_loc_segs in candidate_locs
+        loc for loc in dict.fromkeys(candidates)
+        if os.path.basename(loc) in names_present_in(os.path.dirname(loc))
     ]
-    if TRACE:
-        logger_debug('    detect_version_attribute():', 'candidate_locs1:', candidate_locs)
-
-    for fl in get_module_scripts(
-        location=setup_py_dir,
-        max_depth=4,
-        interesting_names=special_names,
-    ):
-        candidate_locs.append(fl)
 
     if TRACE:
         logger_debug('    detect_version_attribute():', 'candidate_locs2:')
         for loc in candidate_locs:
             logger_debug('        loc:', loc)
 
-    version = detect_version_in_locations(
-        candidate_locs=candidate_locs,
-        detector=find_dunder_version
-    )
+    version = detect_any_version_in_locations(candidate_locs=candidate_locs)
     if TRACE:
         logger_debug('    detect_version_attribute():', 'version2:', version)
 
-    if version:
-        return version
+    return version
 
-    version = detect_version_in_locations(
-        candidate_locs=candidate_locs,
-        detector=find_plain_version,
-    )
+
+def detect_any_version_in_locations(candidate_locs):
+    """
+    Return the first version found in a location from the `candidate_locs`
+    list, trying a dunder __version__ then a plain version attribute on each
+    file in turn. Return None if no version is found.
+    Each candidate file is read once and both patterns run over that buffer.
+    """
     if TRACE:
-        logger_debug('    detect_version_attribute():', 'version3:', version)
+        logger_debug('      detect_any_version_in_locations():', 'candidate_locs:', candidate_locs)
 
-    return version
+    for loc in candidate_locs:
+        try:
+            content = read_version_file(loc)
+        except OSError:
+            # a candidate may have gone away since it was assembled
+            continue
+
+        match = dunder_version_pattern.search(content) or plain_version_pattern.search(content)
+        if TRACE:
+            logger_debug('        detect_any_version_in_locations:', 'loc:', loc, 'match:', match)
+
+        if match:
+            return match.group(1).strip().decode('utf-8')
 
 
 def detect_version_in_locations(candidate_locs, detector=find_plain_version):
@@ -1895,13 +2384,13 @@ def detect_version_in_locations(candidate_locs, detector=find_plain_version):
         logger_debug('      detect_version_in_locations():', 'candidate_locs:', candidate_locs)
 
     for loc in candidate_locs:
-        if not os.path.exists(loc):
-            continue
-
         if TRACE: logger_debug('        detect_version_in_locations:', 'loc:', loc)
 
-        # here the file exists try to get a dunder version
-        version = detector(loc)
+        try:
+            version = detector(loc)
+        except OSError:
+            # a candidate may have gone away since it was assembled
+            continue
 
         if TRACE:
             logger_debug(
@@ -1914,6 +2403,24 @@ def detect_version_in_locations(candidate_locs, detector=find_plain_version):
             return version
 
 
+# directories that can never contain the module scripts we look for: caches,
+# SCM internals, environments and build output. Pruned from the walk
+skipped_directory_names = frozenset([
+    '__pycache__',
+    '.git',
+    '.hg',
+    '.svn',
+    '.tox',
+    '.venv',
+    'venv',
+    'node_modules',
+    'build',
+    'dist',
+    '.mypy_cache',
+    '.pytest_cache',
+])
+
+
 def get_module_scripts(location, max_depth=1, interesting_names=()):
     """
     Yield interesting Python script paths that have a name in
@@ -1928,23 +2435,37 @@ def get_module_scripts(location, max_depth=1, interesting_names=()):
             'interesting_names:', interesting_names
         )
 
+    interesting_names = frozenset(interesting_names)
+    if not interesting_names:
+        return
+
     location = location.rstrip(os.path.sep)
     if TRACE: logger_debug('        get_module_scripts:', 'location:', location)
 
-    for top, _dirs, files in os.walk(location):
-        current_depth = compute_path_depth(location, top)
+    # breadth-first walk with explicit depth tracking: scandir returns
+    # DirEntry objects whose file/dir type is known without an extra stat, and
+    # subtrees deeper than max_depth are never entered
+    directories = deque([(location, 0)])
+    while directories:
+        top, depth = directories.popleft()
         if TRACE:
-            logger_debug('           get_module_scripts:', 'current_depth:', current_depth)
-            logger_debug('           get_module_scripts:', 'top:', top, '_dirs:', _dirs, 'files:', files)
-        if current_depth >= max_depth:
-            break
-        for f in files:
-            if TRACE: logger_debug('              get_module_scripts:', 'file:', f)
-
-            if f in interesting_names:
-                path = os.path.join(top, f)
-                if TRACE: logger_debug('                  get_module_scripts:', 'path:', path)
-                yield path
+            logger_debug('           get_module_scripts:', 'top:', top, 'depth:', depth)
+        try:
+            entries = list(os.scandir(top))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                if entry.name in interesting_names:
+                    if TRACE:
+                        logger_debug('                  get_module_scripts:', 'path:', entry.path)
+                    yield entry.path
+            elif (
+                entry.is_dir(follow_symlinks=False)
+                and depth + 1 < max_depth
+                and entry.name not in skipped_directory_names
+            ):
+                directories.append((entry.path, depth + 1))
 
 
 def compute_path_depth(base, path):
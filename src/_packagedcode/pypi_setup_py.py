@@ -8,12 +8,17 @@
 
 
 import ast
+import re
 from pathlib import Path
 
 """
 Parse setup.py files.
 """
 
+# cheap probe for a setup() call: when the source does not contain one there
+# is no point in paying for a full AST parse
+has_setup_call = re.compile(r'\bsetup\s*\(').search
+
 # https://setuptools.readthedocs.io/en/latest/setuptools.html#metadata
 FIELDS = {
     'author_email',
@@ -75,7 +80,11 @@ def parse_setup_py(location):
     file at ``location`` or an empty mapping.
     """
     path = Path(location)
-    tree = tuple(ast.parse(path.read_text(encoding='utf8')).body)
+    setup_text = path.read_text(encoding='utf8')
+    if not has_setup_call(setup_text):
+        return {}
+
+    tree = tuple(ast.parse(setup_text).body)
     body = tuple(get_body(tree))
 
     call = get_setup_call(tree)
@@ -14,6 +14,7 @@ from typing import List
 from packageurl import PackageURL
 
 from _packagedcode.models import PackageData
+from _packagedcode.pypi import get_classifiers
 from _packagedcode.pypi import get_declared_license
 from _packagedcode.pypi import get_description
 from _packagedcode.pypi import get_keywords
@@ -81,6 +82,10 @@ def get_pypi_data_from_purl(
         if wheel_url:
             valid_distribution_urls.append(wheel_url)
 
+    # extract the classifiers once: they feed both the declared license and
+    # the keywords of every yielded PackageData
+    license_classifiers, other_classifiers = get_classifiers(info)
+
     urls = response.get("urls") or []
     for url in urls:
         dist_url = url.get("url")
@@ -96,13 +101,13 @@ def get_pypi_data_from_purl(
             bug_tracking_url=bug_tracking_url,
             code_view_url=code_view_url,
             license_expression=info.get("license_expression"),
-            declared_license=get_declared_license(info),
+            declared_license=get_declared_license(info, license_classifiers=license_classifiers),
             download_url=dist_url,
             size=url.get("size"),
             md5=digests.get("md5") or url.get("md5_digest"),
             sha256=digests.get("sha256"),
             release_date=url.get("upload_time"),
-            keywords=get_keywords(info),
+            keywords=get_keywords(info, other_classifiers=other_classifiers),
             parties=get_parties(
                 info,
                 author_key="author",
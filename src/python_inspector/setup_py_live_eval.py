@@ -161,7 +161,7 @@ def iter_requirements(level, extras, setup_file):
             continue
 
         specs = pkg.specifier
-        specs = {s.operator: s.version for s in specs._specs}
+        specs = {s.operator: s.version for s in specs}
         if ((">=" in specs) and (">" in specs)) or (("<=" in specs) and ("<" in specs)):
             print(
                 "ERROR: Do not specify such weird constraints! " '("{0}")'.format(pkg),
@@ -8,6 +8,7 @@
 #
 
 from _packagedcode.models import DependentPackage
+from _packagedcode.pypi import SetupCfgHandler
 from _packagedcode.pypi import create_dependency_for_python_requires
 
 
@@ -17,3 +18,44 @@ def test_create_dependency_for_python_requires():
     ) == DependentPackage(
         purl="pkg:generic/python", extracted_requirement="python_requires>=3.6", scope="python"
     )
+
+
+def parse_setup_cfg(tmp_path, text):
+    location = tmp_path / "setup.cfg"
+    location.write_text(text)
+    packages = list(SetupCfgHandler.parse(str(location)))
+    assert len(packages) == 1
+    return packages[0]
+
+
+def test_setup_cfg_parse_simple_metadata(tmp_path):
+    package = parse_setup_cfg(tmp_path, "[metadata]\nname = foo\nversion = 1.0\n")
+    assert package.name == "foo"
+    assert package.version == "1.0"
+
+
+def test_setup_cfg_parse_interpolated_values(tmp_path):
+    package = parse_setup_cfg(
+        tmp_path,
+        "[DEFAULT]\nver = 9.9\n[metadata]\nname = foo\nversion = %(ver)s\n",
+    )
+    assert package.name == "foo"
+    assert package.version == "9.9"
+
+
+def test_setup_cfg_parse_indented_option_lines(tmp_path):
+    package = parse_setup_cfg(
+        tmp_path,
+        "[metadata]\n  name = indented\nversion = 1.0\n",
+    )
+    assert package.name == "indented"
+    assert package.version == "1.0"
+
+
+def test_setup_cfg_parse_mixed_case_option_names(tmp_path):
+    package = parse_setup_cfg(
+        tmp_path,
+        "[metadata]\nName = foo\nversion = 1.0\n",
+    )
+    assert package.name == "foo"
+    assert package.version == "1.0"
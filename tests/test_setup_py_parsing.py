@@ -11,10 +11,24 @@ import os
 
 from _packagedcode.models import DependentPackage
 from _packagedcode.pypi import PythonSetupPyHandler
+from _packagedcode.pypi import parse_many
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+def test_parse_many_setup_py():
+    # the parsed PackageData must survive the worker pickling roundtrip
+    locations = [
+        os.path.join(BASE_DIR, "data", "setup", "simple-setup.py"),
+        os.path.join(BASE_DIR, "data", "partial-setup.py"),
+    ]
+    packages = list(parse_many(PythonSetupPyHandler, locations, max_workers=2))
+    assert sorted((pkg.name, pkg.version) for pkg in packages) == [
+        ("Example-App", "2.4.0"),
+        ("example", "0.0.1"),
+    ]
+
+
 def test_setup_py_parsing():
     setup_py_file = os.path.join(BASE_DIR, "data", "setup", "simple-setup.py")
     package_data = list(PythonSetupPyHandler.parse(location=setup_py_file))